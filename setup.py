@@ -27,6 +27,9 @@ setup(
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.6",
+    extras_require={
+        "fast": ["orjson"],
+    },
     entry_points={
         "console_scripts": [
             "timefocus=timefocus:main",
@@ -8,7 +8,10 @@ import os
 import sys
 import io
 import json
+import gc
 import time
+import weakref
+from contextlib import redirect_stdout
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -18,7 +21,7 @@ if sys.stdout.encoding != 'utf-8':
 
 # Import TimeFocus
 sys.path.insert(0, os.path.dirname(__file__))
-from timefocus import TimeFocus, DATA_FILE
+from timefocus import TimeFocus, DATA_FILE, print_week_stats
 
 
 class TestTimeFocus:
@@ -37,8 +40,7 @@ class TestTimeFocus:
             DATA_FILE.rename(self.backup_file)
         
         # Clean test data
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         # Monkey-patch DATA_FILE in timefocus module
         import timefocus
@@ -51,13 +53,19 @@ class TestTimeFocus:
         timefocus.DATA_FILE = DATA_FILE
         
         # Remove test data
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         # Restore real data
         if hasattr(self, 'backup_file') and self.backup_file.exists():
             self.backup_file.rename(DATA_FILE)
     
+    def clean_data_files(self):
+        """Remove the test snapshot and its append log"""
+        for path in (self.test_data_file, self.test_data_file.with_suffix('.jsonl'),
+                     self.test_data_file.with_suffix('.json.tmp')):
+            if path.exists():
+                path.unlink()
+    
     def assert_equal(self, actual, expected, test_name):
         """Assert equality"""
         if actual == expected:
@@ -83,8 +91,7 @@ class TestTimeFocus:
         print("\n📦 Test: Initialization")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         self.assert_true(isinstance(tf.data, dict), "Creates data dictionary")
@@ -96,8 +103,7 @@ class TestTimeFocus:
         print("\n📝 Test: Record Session")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         initial_count = len(tf.data["sessions"])
@@ -113,7 +119,7 @@ class TestTimeFocus:
         session = tf.data["sessions"][-1]
         self.assert_equal(session["type"], "work", "Correct session type")
         self.assert_equal(session["duration"], 25, "Correct duration")
-        self.assert_equal(session["task"], "Test task", "Correct task")
+        self.assert_equal(tf.task_name(session), "Test task", "Correct task")
         self.assert_equal(session["completed"], True, "Marked as completed")
         self.assert_true("timestamp" in session, "Has timestamp")
     
@@ -122,8 +128,7 @@ class TestTimeFocus:
         print("\n📊 Test: Today's Statistics")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         
@@ -145,8 +150,7 @@ class TestTimeFocus:
         print("\n📅 Test: Week Statistics")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         
@@ -172,6 +176,15 @@ class TestTimeFocus:
         self.assert_equal(stats["work_minutes"], 75, "Correct week work time")
         self.assert_equal(stats["sessions_completed"], 2, "Correct week sessions")
         self.assert_true(len(stats["by_day"]) > 0, "Has by-day breakdown")
+        self.assert_equal(stats["by_day"][today.weekday()], 50, "By-day keyed by weekday index")
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            print_week_stats(stats)
+        self.assert_true(
+            f"  {today.strftime('%A'):10} 50m" in output.getvalue().splitlines(),
+            "Weekday index printed as day name"
+        )
     
     def test_format_time(self):
         """Test time formatting"""
@@ -181,13 +194,64 @@ class TestTimeFocus:
         self.assert_equal(TimeFocus.format_time(90), "1h 30m", "Hours and minutes")
         self.assert_equal(TimeFocus.format_time(120), "2h 0m", "Exact hours")
     
+    def run_countdown(self, tty, early_wakeup=False, minutes=1):
+        """Run a countdown against a fake clock and terminal"""
+        class FakeStdout(io.StringIO):
+            def isatty(self):
+                return tty
+        
+        clock = [0.0]
+        sleeps = []
+        
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            # Optionally wake up halfway through longer sleeps
+            clock[0] += seconds / 2 if early_wakeup and seconds > 0.1 else seconds
+        
+        real_sleep, real_monotonic, real_stdout = time.sleep, time.monotonic, sys.stdout
+        time.sleep, time.monotonic = fake_sleep, lambda: clock[0]
+        sys.stdout = FakeStdout()
+        try:
+            result = TimeFocus.countdown(minutes, "Work time")
+            output = sys.stdout.getvalue()
+        finally:
+            time.sleep, time.monotonic, sys.stdout = real_sleep, real_monotonic, real_stdout
+        
+        frames = [line for line in output.split("\r") if "⏱️" in line]
+        return result, sleeps, frames
+    
+    def test_countdown(self):
+        """Test countdown sleeps once off a terminal and redraws once per second on one"""
+        print("\n⏱️  Test: Countdown")
+        
+        result, sleeps, frames = self.run_countdown(tty=False)
+        self.assert_true(result, "Non-TTY countdown completes")
+        self.assert_equal(sleeps, [60], "Non-TTY sleeps exactly once")
+        self.assert_equal(frames, [], "Non-TTY never redraws")
+        
+        result, sleeps, frames = self.run_countdown(tty=False, minutes=-1)
+        self.assert_true(result, "Non-TTY negative duration completes")
+        self.assert_equal(sleeps, [0], "Non-TTY negative duration does not sleep")
+        
+        result, sleeps, frames = self.run_countdown(tty=True, minutes=-1)
+        self.assert_true(result, "TTY negative duration completes")
+        
+        result, sleeps, frames = self.run_countdown(tty=True)
+        self.assert_true(result, "TTY countdown completes")
+        self.assert_equal(len(sleeps), 60, "TTY wakes once per second")
+        self.assert_equal(len(frames), 60, "TTY redraws once per second")
+        self.assert_true("01:00" in frames[0] and "00:01" in frames[-1], "Counts down from full duration")
+        
+        result, sleeps, frames = self.run_countdown(tty=True, early_wakeup=True)
+        self.assert_equal(len(frames), len(set(frames)), "No redraw when shown second is unchanged")
+        self.assert_equal(len(frames), 60, "Early wakeups still show every second")
+    
     def test_data_persistence(self):
         """Test data saves and loads correctly"""
         print("\n💾 Test: Data Persistence")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         # Create and save data
         tf1 = TimeFocus()
@@ -208,8 +272,7 @@ class TestTimeFocus:
         print("\n⏸️  Test: Incomplete Sessions")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         
@@ -227,8 +290,7 @@ class TestTimeFocus:
         print("\n☕ Test: Break Tracking")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         
@@ -247,28 +309,51 @@ class TestTimeFocus:
         print("\n📝 Test: Task Association")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         
         tf.record_session("work", 25, "Fix bug #123", True)
         tf.record_session("work", 25, "Write docs", True)
+        tf.record_session("work", 25, "Write docs", True)
         
         sessions = tf.data["sessions"]
-        tasks = [s["task"] for s in sessions if s["task"]]
+        tasks = [tf.task_name(s) for s in sessions if tf.task_name(s)]
         
-        self.assert_equal(len(tasks), 2, "Both tasks recorded")
+        self.assert_equal(len(tasks), 3, "All tasks recorded")
         self.assert_true("Fix bug #123" in tasks, "First task found")
         self.assert_true("Write docs" in tasks, "Second task found")
+        self.assert_equal(tf.data["tasks"], ["Fix bug #123", "Write docs"], "Repeated task stored once")
+        
+        reloaded = TimeFocus()
+        self.assert_equal(
+            [reloaded.task_name(s) for s in reloaded.data["sessions"]],
+            ["Fix bug #123", "Write docs", "Write docs"],
+            "Tasks survive reload"
+        )
+        self.assert_true(
+            all("task" not in s and "task_id" in s for s in reloaded.data["sessions"]),
+            "Logged sessions interned on load"
+        )
+        
+        # Sessions added without any task key still save and reload
+        reloaded.data["sessions"].append({
+            "type": "break",
+            "duration": 5,
+            "completed": True,
+            "timestamp": datetime.now().isoformat()
+        })
+        reloaded.save_data()
+        
+        restored = TimeFocus()
+        self.assert_equal(restored.task_name(restored.data["sessions"][-1]), None, "Missing task saved as none")
     
     def test_empty_stats(self):
         """Test stats with no data"""
         print("\n📊 Test: Empty Statistics")
         
         # Clean start
-        if self.test_data_file.exists():
-            self.test_data_file.unlink()
+        self.clean_data_files()
         
         tf = TimeFocus()
         
@@ -276,6 +361,216 @@ class TestTimeFocus:
         
         self.assert_equal(stats["work_minutes"], 0, "Zero work time")
         self.assert_equal(stats["sessions_completed"], 0, "Zero sessions")
+        
+        week = tf.get_week_stats()
+        
+        self.assert_equal(week["work_minutes"], 0, "Zero week work time")
+        self.assert_equal(week["by_day"], {}, "Empty by-day breakdown")
+    
+    def test_daily_backfill(self):
+        """Test per-day aggregates are rebuilt for older history files"""
+        print("\n🗓️  Test: Daily Backfill")
+        
+        # History saved before per-day aggregates existed
+        now = datetime.now().isoformat()
+        legacy = {
+            "sessions": [
+                {"type": "work", "duration": 25, "task": "Old", "completed": True, "timestamp": now},
+                {"type": "break", "duration": 5, "task": None, "completed": True, "timestamp": now}
+            ],
+            "settings": {}
+        }
+        with open(self.test_data_file, 'w', encoding='utf-8') as f:
+            json.dump(legacy, f)
+        
+        tf = TimeFocus()
+        stats = tf.get_today_stats()
+        
+        self.assert_equal(stats["work_minutes"], 25, "Backfilled work time")
+        self.assert_equal(stats["break_minutes"], 5, "Backfilled break time")
+        self.assert_true(datetime.now().date().isoformat() in tf.data["daily"], "Has today's aggregate")
+        self.assert_true("task" not in tf.data["sessions"][0], "Inline task text migrated")
+        self.assert_equal(tf.task_name(tf.data["sessions"][0]), "Old", "Migrated task resolves")
+        
+        with open(self.test_data_file, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assert_true("daily" in snapshot and "tasks" in snapshot, "Migrated history saved once")
+        
+        tf.record_session("work", 25, "New", True)
+        self.assert_equal(tf.get_today_stats()["work_minutes"], 50, "Aggregate updated incrementally")
+    
+    def test_append_log(self):
+        """Test sessions are appended to the log and compacted into the snapshot"""
+        print("\n🧾 Test: Append Log")
+        
+        # Clean start
+        self.clean_data_files()
+        log_file = self.test_data_file.with_suffix('.jsonl')
+        
+        tf = TimeFocus()
+        tf.record_session("work", 25, "Logged", True)
+        tf.record_session("break", 5, None, True)
+        
+        self.assert_true(log_file.exists(), "Sessions appended to log")
+        self.assert_true(not self.test_data_file.exists(), "Snapshot not rewritten per session")
+        
+        tf.save_data()
+        
+        self.assert_true(not log_file.exists(), "Log cleared after compaction")
+        
+        with open(self.test_data_file, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assert_equal(snapshot["sessions"]["duration"], [25, 5], "Snapshot stores sessions by field")
+        self.assert_true("extra" not in snapshot["sessions"], "No extra column for plain sessions")
+        
+        tf.record_session("work", 25, "After compaction", True)
+        reloaded = TimeFocus()
+        
+        self.assert_equal(len(reloaded.data["sessions"]), 3, "Snapshot and log combined on load")
+        self.assert_equal(reloaded.get_today_stats()["work_minutes"], 50, "Logged sessions counted in stats")
+    
+    def test_session_extra_fields(self):
+        """Test keys outside the snapshot columns survive compaction"""
+        print("\n🧩 Test: Extra Session Fields")
+        
+        # Clean start
+        self.clean_data_files()
+        
+        tf = TimeFocus()
+        tf.record_session("work", 25, "Tagged", True)
+        tf.data["sessions"][-1]["tag"] = "deep"
+        tf.record_session("work", 25, "Plain", True)
+        tf.save_data()
+        
+        sessions = TimeFocus().data["sessions"]
+        self.assert_equal(sessions[0].get("tag"), "deep", "Extra key preserved")
+        self.assert_true("tag" not in sessions[1], "Extra key not copied to other sessions")
+    
+    def test_log_compaction(self):
+        """Test the log is compacted once it holds COMPACT_EVERY sessions"""
+        print("\n🗜️  Test: Log Compaction")
+        
+        # Clean start
+        self.clean_data_files()
+        log_file = self.test_data_file.with_suffix('.jsonl')
+        
+        import timefocus
+        compact_every = timefocus.COMPACT_EVERY
+        timefocus.COMPACT_EVERY = 3
+        try:
+            tf = TimeFocus()
+            tf.record_session("work", 25, "One", True)
+            tf.record_session("work", 25, "Two", True)
+            
+            self.assert_true(not self.test_data_file.exists(), "No snapshot before threshold")
+            
+            # A fresh instance counts the entries already in the log
+            tf = TimeFocus()
+            tf.record_session("work", 25, "Three", True)
+            
+            self.assert_true(self.test_data_file.exists(), "Snapshot written at threshold")
+            self.assert_true(not log_file.exists(), "Log cleared after compaction")
+            
+            tf.record_session("work", 25, "Four", True)
+            self.assert_true(log_file.exists(), "Next session starts a new log")
+            self.assert_equal(len(TimeFocus().data["sessions"]), 4, "All sessions reload")
+        finally:
+            timefocus.COMPACT_EVERY = compact_every
+    
+    def test_interrupted_compaction(self):
+        """Test a log left behind by an interrupted compaction is not replayed twice"""
+        print("\n🛟 Test: Interrupted Compaction")
+        
+        # Clean start
+        self.clean_data_files()
+        log_file = self.test_data_file.with_suffix('.jsonl')
+        
+        tf = TimeFocus()
+        tf.record_session("work", 25, "One", True)
+        tf.record_session("work", 25, "Two", True)
+        logged = log_file.read_bytes()
+        
+        # Snapshot written, but the process died before removing the log
+        tf.save_data()
+        log_file.write_bytes(logged)
+        
+        reloaded = TimeFocus()
+        self.assert_equal(len(reloaded.data["sessions"]), 2, "Covered log lines skipped")
+        self.assert_equal(reloaded.get_today_stats()["work_minutes"], 50, "Sessions counted once")
+        self.assert_true(not self.test_data_file.with_suffix('.json.tmp').exists(), "No temp snapshot left")
+    
+    def test_torn_log_line(self):
+        """Test a partially written log line does not swallow the next session"""
+        print("\n🩹 Test: Torn Log Line")
+        
+        # Clean start
+        self.clean_data_files()
+        log_file = self.test_data_file.with_suffix('.jsonl')
+        
+        tf = TimeFocus()
+        tf.record_session("work", 25, "Before crash", True)
+        with open(log_file, 'ab') as f:
+            f.write(b'{"type":"wo')
+        
+        tf = TimeFocus()
+        self.assert_equal(len(tf.data["sessions"]), 1, "Torn line skipped on load")
+        
+        tf.record_session("work", 30, "After crash", True)
+        reloaded = TimeFocus()
+        
+        self.assert_equal(len(reloaded.data["sessions"]), 2, "Next append survives torn line")
+        self.assert_equal(reloaded.get_today_stats()["work_minutes"], 55, "Both sessions counted")
+    
+    def test_instance_release(self):
+        """Test instances without an open log are not kept alive at exit"""
+        print("\n♻️  Test: Instance Release")
+        
+        # Clean start
+        self.clean_data_files()
+        
+        tf = TimeFocus()
+        tf.get_today_stats()
+        ref = weakref.ref(tf)
+        del tf
+        gc.collect()
+        self.assert_true(ref() is None, "Stats-only instance released")
+        
+        tf = TimeFocus()
+        tf.record_session("work", 25, "Logged", True)
+        tf.save_data()
+        ref = weakref.ref(tf)
+        del tf
+        gc.collect()
+        self.assert_true(ref() is None, "Instance released after log is closed")
+    
+    def test_stats_cache(self):
+        """Test stats are reused until a new session is recorded"""
+        print("\n⚡ Test: Stats Cache")
+        
+        # Clean start
+        self.clean_data_files()
+        
+        tf = TimeFocus()
+        tf.record_session("work", 25, "Cached", True)
+        
+        # Count how often stats are actually computed
+        computed = []
+        compute = tf._today_stats
+        tf._today_stats = lambda today: computed.append(today) or compute(today)
+        
+        first = tf.get_today_stats()
+        self.assert_equal(tf.get_today_stats(), first, "Repeated call returns same stats")
+        self.assert_equal(len(computed), 1, "Repeated call reuses result")
+        
+        first["work_minutes"] = 999
+        self.assert_equal(tf.get_today_stats()["work_minutes"], 25, "Caller changes do not leak into cache")
+        
+        week = tf.get_week_stats()
+        week["by_day"].clear()
+        self.assert_true(tf.get_week_stats()["by_day"], "Week by-day copied too")
+        
+        tf.record_session("work", 25, "Invalidates", True)
+        self.assert_equal(tf.get_today_stats()["work_minutes"], 50, "New session invalidates cache")
     
     def run_all(self):
         """Run all tests"""
@@ -291,11 +586,20 @@ class TestTimeFocus:
             self.test_today_stats()
             self.test_week_stats()
             self.test_format_time()
+            self.test_countdown()
             self.test_data_persistence()
             self.test_incomplete_sessions()
             self.test_break_tracking()
             self.test_task_association()
             self.test_empty_stats()
+            self.test_daily_backfill()
+            self.test_append_log()
+            self.test_session_extra_fields()
+            self.test_log_compaction()
+            self.test_interrupted_compaction()
+            self.test_torn_log_line()
+            self.test_instance_release()
+            self.test_stats_cache()
         finally:
             self.teardown()
         
@@ -5,17 +5,18 @@ Pomodoro technique, work sessions, break reminders, and productivity tracking. Z
 """
 
 import os
+import atexit
 import sys
-import io
 import time
-import json
-import argparse
-from datetime import datetime, timedelta
+from math import ceil
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 # Fix Unicode output on Windows
 if sys.stdout.encoding != 'utf-8':
+    import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
 # --- Config ---
@@ -24,27 +25,196 @@ POMODORO_WORK = 25  # minutes
 POMODORO_SHORT_BREAK = 5  # minutes
 POMODORO_LONG_BREAK = 15  # minutes
 POMODORO_CYCLES_BEFORE_LONG = 4
+COMPACT_EVERY = 1000  # logged sessions between full snapshot rewrites
+STATS_CACHE_TTL = 60  # seconds a computed stats result may be reused
+SESSION_FIELDS = ("type", "duration", "completed", "timestamp", "task_id")
+_SESSION_FIELD_SET = frozenset(SESSION_FIELDS)
 
+
+@lru_cache(maxsize=None)
+def _orjson():
+    """Optional faster JSON backend, imported on first use; None if not installed"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def json_loads(raw: bytes):
+    """Decode UTF-8 JSON bytes"""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.loads(raw)
+    import json
+    return json.loads(raw.decode('utf-8'))
+
+
+def json_dumps(obj) -> bytes:
+    """Encode obj as compact UTF-8 JSON bytes"""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(obj)
+    import json
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def pack_sessions(sessions: List[Dict]) -> Dict[str, List]:
+    """Store sessions as one list per field instead of one dict per session"""
+    columns = {field: [s.get(field) for s in sessions] for field in SESSION_FIELDS}
+    
+    # Keys outside SESSION_FIELDS are carried per session rather than dropped
+    extra = [
+        None if s.keys() == _SESSION_FIELD_SET
+        else {k: v for k, v in s.items() if k not in _SESSION_FIELD_SET} or None
+        for s in sessions
+    ]
+    if any(extra):
+        columns["extra"] = extra
+    return columns
+
+
+def unpack_sessions(columns: Dict[str, List]) -> List[Dict]:
+    """Rebuild session dicts from the lists written by pack_sessions"""
+    rows = zip(*(columns[field] for field in SESSION_FIELDS))
+    sessions = [dict(zip(SESSION_FIELDS, row)) for row in rows]
+    for s, extra in zip(sessions, columns.get("extra", ())):
+        if extra:
+            s.update(extra)
+    return sessions
+
+
+def log_path() -> Path:
+    """Append-only session log kept next to DATA_FILE"""
+    return DATA_FILE.with_suffix('.jsonl')
+
+# The hot paths (load_data, get_today_stats, get_week_stats) are bound by file
+# I/O and by walking the session history, not by arithmetic. Startup still
+# reads the whole snapshot and log, so keep that cheap (compact JSON, optional
+# orjson); after it, recording a session costs one log append and stats read
+# at most seven per-day aggregates regardless of history size.
 class TimeFocus:
     """Productivity timer and tracker"""
     
     def __init__(self):
         self.data = self.load_data()
+        # Histories from before per-day aggregates and task interning are
+        # migrated once below and then written back as a fresh snapshot
+        migrate = bool(self.data["sessions"]) and not ("daily" in self.data and "tasks" in self.data)
+        
+        # Number of sessions already folded into the per-day aggregates;
+        # histories saved before "daily" existed are backfilled on first use
+        self._folded = len(self.data["sessions"]) if "daily" in self.data else 0
+        self.data.setdefault("daily", {})
+        
+        # Task text is stored once in data["tasks"] and referenced by index
+        if "tasks" in self.data:
+            self._task_ix: Dict[str, int] = {task: i for i, task in enumerate(self.data["tasks"])}
+        else:
+            self.data["tasks"] = []
+            self._task_ix = {}
+            for s in self.data["sessions"]:
+                self._intern_task(s)
+        
+        # Logged sessions carry their task text until they are folded below
+        logged, self._logged = self.load_log(len(self.data["sessions"]))
+        self.data["sessions"].extend(logged)
+        self._log = None
+        self._stats_cache: Dict[Tuple[str, str, int], Tuple[float, Dict]] = {}
+        self._update_daily()
+        
+        if migrate:
+            self.save_data()
     
     def load_data(self) -> Dict:
-        """Load session history"""
-        if DATA_FILE.exists():
+        """Load the last session history snapshot"""
+        # Anything shorter than 3 bytes ("", "{}") holds no history to parse
+        if DATA_FILE.exists() and DATA_FILE.stat().st_size >= 3:
             try:
-                with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                data = json_loads(DATA_FILE.read_bytes())
+                # Snapshots written before the columnar format hold a list
+                if isinstance(data["sessions"], dict):
+                    data["sessions"] = unpack_sessions(data["sessions"])
+                return data
             except:
                 pass
-        return {"sessions": [], "settings": {}}
+        return {"sessions": [], "settings": {}, "daily": {}, "tasks": []}
+    
+    @staticmethod
+    def load_log(covered: int = 0) -> Tuple[List[Dict], int]:
+        """Load logged sessions the snapshot does not already cover.
+        
+        Returns those sessions and the number of readable lines in the log.
+        """
+        sessions = []
+        lines = 0
+        log = log_path()
+        if log.exists():
+            with open(log, 'rb') as f:
+                for line in f:
+                    try:
+                        session = json_loads(line)
+                    except ValueError:
+                        # Partially written line from an interrupted append
+                        continue
+                    lines += 1
+                    # Lines left behind by a compaction that died before
+                    # removing the log are already in the snapshot
+                    if session.pop("seq", covered) >= covered:
+                        sessions.append(session)
+        return sessions, lines
     
     def save_data(self):
-        """Save session history"""
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        """Save a full snapshot of session history and clear the append log"""
+        self._update_daily()
+        snapshot = dict(self.data, sessions=pack_sessions(self.data["sessions"]))
+        
+        # Replace the snapshot atomically so an interrupted write never
+        # leaves a truncated file behind
+        tmp = DATA_FILE.with_suffix('.json.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(json_dumps(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, DATA_FILE)
+        
+        self._close_log()
+        log = log_path()
+        if log.exists():
+            log.unlink()
+        self._logged = 0
+    
+    def append_log(self, session: Dict, seq: int):
+        """Append one session, at index seq of the history, to the log"""
+        # Opened on first append and kept for the life of the process;
+        # unbuffered so each session is a single write() syscall
+        if self._log is None:
+            self._log = open(log_path(), 'a+b', buffering=0)
+            # Only registered while a handle is open, so idle instances
+            # are not kept alive by the atexit table
+            atexit.register(self._close_log)
+            
+            # Terminate a line torn by an interrupted append, otherwise the
+            # next record would be glued onto it and lost with it on load
+            if self._log.seek(0, os.SEEK_END):
+                self._log.seek(-1, os.SEEK_END)
+                if self._log.read(1) != b'\n':
+                    self._write_log(b'\n')
+        self._write_log(json_dumps(dict(session, seq=seq)) + b'\n')
+        self._logged += 1
+    
+    def _write_log(self, raw: bytes):
+        """Write all of raw to the unbuffered log, retrying short writes"""
+        view = memoryview(raw)
+        while view:
+            view = view[self._log.write(view):]
+    
+    def _close_log(self):
+        """Close the append log handle if it is open"""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+            atexit.unregister(self._close_log)
     
     def record_session(self, session_type: str, duration: int, task: str = None, completed: bool = True):
         """Record a completed session"""
@@ -56,46 +226,120 @@ class TimeFocus:
             "timestamp": datetime.now().isoformat()
         }
         self.data["sessions"].append(session)
-        self.save_data()
-    
-    def get_today_stats(self) -> Dict:
-        """Get today's productivity stats"""
-        today = datetime.now().date()
-        today_sessions = [
-            s for s in self.data["sessions"]
-            if datetime.fromisoformat(s["timestamp"]).date() == today
-        ]
+        self._stats_cache.clear()
         
-        work_time = sum(s["duration"] for s in today_sessions if s["type"] == "work" and s["completed"])
-        break_time = sum(s["duration"] for s in today_sessions if s["type"] == "break" and s["completed"])
-        completed = sum(1 for s in today_sessions if s["type"] == "work" and s["completed"])
+        # Logged before folding so the line keeps its task text
+        self.append_log(session, len(self.data["sessions"]) - 1)
+        self._update_daily()
         
+        # Fold the log into a fresh snapshot once it holds COMPACT_EVERY sessions
+        if self._logged >= COMPACT_EVERY:
+            self.save_data()
+    
+    def _intern_task(self, session: Dict):
+        """Replace a session's task text with its index in data["tasks"]"""
+        if "task" not in session:
+            session.setdefault("task_id", None)
+            return
+        task = session.pop("task")
+        task_id = None
+        if task is not None:
+            task_id = self._task_ix.get(task)
+            if task_id is None:
+                task_id = self._task_ix[task] = len(self.data["tasks"])
+                self.data["tasks"].append(task)
+        session["task_id"] = task_id
+    
+    def task_name(self, session: Dict) -> Optional[str]:
+        """Get the task text of a session"""
+        if "task" in session:
+            return session["task"]
+        task_id = session.get("task_id")
+        return None if task_id is None else self.data["tasks"][task_id]
+    
+    @staticmethod
+    def _empty_day() -> Dict:
+        """Zeroed per-day aggregate"""
         return {
-            "work_minutes": work_time,
-            "break_minutes": break_time,
-            "sessions_completed": completed,
-            "total_sessions": len([s for s in today_sessions if s["type"] == "work"])
+            "work_minutes": 0,
+            "break_minutes": 0,
+            "sessions_completed": 0,
+            "total_sessions": 0
         }
     
-    def get_week_stats(self) -> Dict:
-        """Get this week's productivity stats"""
+    def _update_daily(self) -> Dict[str, Dict]:
+        """Fold sessions not yet counted into the per-day aggregates and intern their tasks"""
+        sessions = self.data["sessions"]
+        daily = self.data["daily"]
+        
+        for s in sessions[self._folded:]:
+            self._intern_task(s)
+            
+            # isoformat() timestamps start with the YYYY-MM-DD date
+            day = s["timestamp"][:10]
+            totals = daily.setdefault(day, self._empty_day())
+            if s["type"] == "work":
+                totals["total_sessions"] += 1
+                if s["completed"]:
+                    totals["sessions_completed"] += 1
+                    totals["work_minutes"] += s["duration"]
+            elif s["type"] == "break" and s["completed"]:
+                totals["break_minutes"] += s["duration"]
+        
+        self._folded = len(sessions)
+        return daily
+    
+    def _cached_stats(self, kind: str, compute: Callable[[date], Dict]) -> Dict:
+        """Reuse stats until a session is added, the day changes or the TTL expires"""
         today = datetime.now().date()
-        week_start = today - timedelta(days=today.weekday())
+        key = (kind, today.isoformat(), len(self.data["sessions"]))
+        now = time.monotonic()
         
-        week_sessions = [
-            s for s in self.data["sessions"]
-            if datetime.fromisoformat(s["timestamp"]).date() >= week_start
-        ]
+        cached = self._stats_cache.get(key)
+        if cached is None or now - cached[0] >= STATS_CACHE_TTL:
+            cached = self._stats_cache[key] = (now, compute(today))
         
-        work_time = sum(s["duration"] for s in week_sessions if s["type"] == "work" and s["completed"])
-        completed = sum(1 for s in week_sessions if s["type"] == "work" and s["completed"])
+        # Callers get their own copy so they cannot alter the cached result
+        stats = dict(cached[1])
+        if "by_day" in stats:
+            stats["by_day"] = dict(stats["by_day"])
+        return stats
+    
+    def get_today_stats(self) -> Dict:
+        """Get today's productivity stats"""
+        if not self.data["sessions"]:
+            return self._empty_day()
+        return self._cached_stats("today", self._today_stats)
+    
+    def get_week_stats(self) -> Dict:
+        """Get this week's productivity stats"""
+        if not self.data["sessions"]:
+            return {"work_minutes": 0, "sessions_completed": 0, "by_day": {}}
+        return self._cached_stats("week", self._week_stats)
+    
+    def _today_stats(self, today: date) -> Dict:
+        """Compute today's stats from the daily aggregates"""
+        daily = self._update_daily()
+        return dict(daily.get(today.isoformat(), self._empty_day()))
+    
+    def _week_stats(self, today: date) -> Dict:
+        """Compute this week's stats from the daily aggregates"""
+        week_start = today - timedelta(days=today.weekday())
+        daily = self._update_daily()
         
-        # Count by day
+        work_time = completed = 0
         by_day = {}
-        for s in week_sessions:
-            if s["type"] == "work" and s["completed"]:
-                day = datetime.fromisoformat(s["timestamp"]).strftime("%A")
-                by_day[day] = by_day.get(day, 0) + s["duration"]
+        for i in range(7):
+            day = week_start + timedelta(days=i)
+            totals = daily.get(day.isoformat())
+            if totals is None:
+                continue
+            work_time += totals["work_minutes"]
+            completed += totals["sessions_completed"]
+            
+            # Count by day, keyed by weekday (0 = Monday)
+            if totals["work_minutes"]:
+                by_day[i] = totals["work_minutes"]
         
         return {
             "work_minutes": work_time,
@@ -116,16 +360,29 @@ class TimeFocus:
     def countdown(minutes: int, label: str = "Time remaining"):
         """Display countdown timer"""
         total_seconds = minutes * 60
-        end_time = time.time() + total_seconds
         
         try:
-            while time.time() < end_time:
-                remaining = int(end_time - time.time())
-                mins, secs = divmod(remaining, 60)
+            # Nobody sees the redraws when output is redirected
+            if not sys.stdout.isatty():
+                time.sleep(max(0, total_seconds))
+                print(f"✅ {label}: Complete!")
+                return True
+            
+            end_time = time.monotonic() + total_seconds
+            shown = None
+            now = time.monotonic()
+            while now < end_time:
+                remaining = ceil(end_time - now)
+                if remaining != shown:
+                    mins, secs = divmod(remaining, 60)
+                    
+                    # Clear line and print countdown
+                    print(f"\r⏱️  {label}: {mins:02d}:{secs:02d}   ", end='', flush=True)
+                    shown = remaining
                 
-                # Clear line and print countdown
-                print(f"\r⏱️  {label}: {mins:02d}:{secs:02d}   ", end='', flush=True)
-                time.sleep(1)
+                # Wake up exactly when the displayed second changes
+                time.sleep(max(0, end_time - (remaining - 1) - time.monotonic()))
+                now = time.monotonic()
             
             print(f"\r✅ {label}: Complete!     ")
             return True
@@ -223,15 +480,19 @@ def print_week_stats(stats: Dict):
     if stats['by_day']:
         print(f"\n📅 By Day:\n")
         days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        for day in days_order:
-            if day in stats['by_day']:
-                print(f"  {day:10} {TimeFocus.format_time(stats['by_day'][day])}")
+        for i, day in enumerate(days_order):
+            minutes = stats['by_day'].get(i)
+            if minutes:
+                print(f"  {day:10} {TimeFocus.format_time(minutes)}")
     
     print()
 
 
 def main():
     """Main CLI interface"""
+    # Imported here so importing the module stays cheap for library use
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="TimeFocus - CLI Productivity Timer & Focus Manager",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -276,6 +537,18 @@ Examples:
         parser.print_help()
         return
     
+    # Reset only touches files, so skip loading the history
+    if args.command == 'reset':
+        confirm = input("⚠️  Reset all data? This cannot be undone. (yes/no): ")
+        if confirm.lower() == 'yes':
+            for path in (DATA_FILE, log_path()):
+                if path.exists():
+                    path.unlink()
+            print("✅ All data reset")
+        else:
+            print("❌ Reset cancelled")
+        return
+    
     tf = TimeFocus()
     
     # Execute command
@@ -305,15 +578,6 @@ Examples:
         else:
             stats = tf.get_today_stats()
             print_today_stats(stats)
-    
-    elif args.command == 'reset':
-        confirm = input("⚠️  Reset all data? This cannot be undone. (yes/no): ")
-        if confirm.lower() == 'yes':
-            if DATA_FILE.exists():
-                DATA_FILE.unlink()
-            print("✅ All data reset")
-        else:
-            print("❌ Reset cancelled")
 
 
 if __name__ == "__main__":